@@ -0,0 +1,155 @@
+# This file is part of CPAchecker,
+# a tool for configurable software verification:
+# https://cpachecker.sosy-lab.org
+#
+# SPDX-FileCopyrightText: 2007-2021 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""C types, alignment attributes, and variable declarations
+used to compose the generated test programs."""
+
+import enum
+
+
+class Alignment(enum.Enum):
+    """An ``__aligned__`` attribute (or its absence) on a type or variable."""
+
+    NoAttr = (0, "")
+    A1 = (1, "__attribute__((__aligned__(1)))")
+    A2 = (2, "__attribute__((__aligned__(2)))")
+    A4 = (4, "__attribute__((__aligned__(4)))")
+    A8 = (8, "__attribute__((__aligned__(8)))")
+    A16 = (16, "__attribute__((__aligned__(16)))")
+    A32 = (32, "__attribute__((__aligned__(32)))")
+    A64 = (64, "__attribute__((__aligned__(64)))")
+
+    def __init__(self, code, attr):
+        self.code = code
+        self.attr = attr
+
+    @staticmethod
+    def from_attr(alignment):
+        """Return the member for the given alignment in bytes (0 for no attribute)."""
+        try:
+            return Alignment._BY_CODE[alignment]
+        except KeyError:
+            raise ValueError(
+                "no alignment attribute for %s bytes" % alignment
+            ) from None
+
+    @staticmethod
+    def get_two_nearest(alignment):
+        """Return the two members with codes nearest to the given alignment:
+        the greatest below it and the smallest above it (clamped at the ends)."""
+        below, above = Alignment._ORDERED[0], Alignment._ORDERED[-1]
+        for a in Alignment._ORDERED:
+            if a.code < alignment:
+                below = a
+            elif a.code > alignment:
+                above = a
+                break
+        return below, above
+
+
+# lookup tables instead of scanning __members__ on every call
+Alignment._BY_CODE = {a.code: a for a in Alignment.__members__.values()}
+Alignment._ORDERED = sorted(
+    (a for a in Alignment.__members__.values() if a != Alignment.NoAttr),
+    key=lambda a: a.code,
+)
+
+
+class CType:
+    """A C type with its (possibly attributed) typeid and the declarations
+    needed before a variable of this type can be declared."""
+
+    def __init__(self, typeid, declaration="", alignment=Alignment.NoAttr):
+        self.typeid = typeid
+        self.declaration = declaration
+        self.alignment = alignment
+
+    def declare(self, name, align=Alignment.NoAttr, as_string=False):
+        """Declare a variable of this type, optionally with an alignment attribute.
+
+        Returns the declaration as a string if ``as_string``, else a `Variable`.
+        """
+        if as_string:
+            if align == Alignment.NoAttr:
+                return "%s %s;" % (self.typeid, name)
+            return "%s %s %s;" % (self.typeid, name, align.attr)
+        return Variable(name, self, align)
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, self.typeid)
+
+
+class Number(CType):
+    """An arithmetic type, identified by the nick used in `Machine` fields."""
+
+    def __init__(self, typenick, typeid):
+        super().__init__(typeid)
+        self.typenick = typenick
+
+    @property
+    def promotes(self):
+        """Whether arithmetic promotes this type to ``int`` (changing its size)."""
+        return self.typenick in ("bool", "char", "short")
+
+
+class Pointer(CType):
+    """A pointer to another `CType`."""
+
+    def __init__(self, ref, alignment=Alignment.NoAttr):
+        typeid = ref.typeid + " *"
+        if alignment != Alignment.NoAttr:
+            # the attribute after the `*` applies to the pointer itself
+            typeid += " " + alignment.attr
+        super().__init__(typeid, ref.declaration, alignment)
+        self.ref = ref
+        self.typenick = getattr(ref, "typenick", "void") + "_ptr"
+
+
+class Array(CType):
+    """An array of some element `CType`."""
+
+    def __init__(self, ref, length, alignment=Alignment.NoAttr):
+        super().__init__("%s[%d]" % (ref.typeid, length), ref.declaration, alignment)
+        self.ref = ref
+        self.length = length
+
+
+class Void(CType):
+    def __init__(self):
+        super().__init__("void")
+
+
+class Variable:
+    """A declared C variable: a name, its `CType`, and its own alignment attribute."""
+
+    def __init__(self, name, ctype, align=Alignment.NoAttr):
+        self.name = name
+        self.ctype = ctype
+        self.align = align
+
+    @property
+    def declaration(self):
+        """The declaration of this variable alone, without the type's declarations."""
+        return self.ctype.declare(self.name, self.align, as_string=True)
+
+    def __repr__(self):
+        return "Variable(%r, %r)" % (self.name, self.ctype)
+
+
+standard_types = {
+    "VOID": Void(),
+    "BOOL": Number("bool", "_Bool"),
+    "CHAR": Number("char", "char"),
+    "SHORT": Number("short", "short"),
+    "INT": Number("int", "int"),
+    "LONG": Number("long", "long"),
+    "LLONG": Number("llong", "long long"),
+    "FLOAT": Number("float", "float"),
+    "DOUBLE": Number("double", "double"),
+    "LDOUBLE": Number("ldouble", "long double"),
+}
@@ -0,0 +1,129 @@
+# This file is part of CPAchecker,
+# a tool for configurable software verification:
+# https://cpachecker.sosy-lab.org
+#
+# SPDX-FileCopyrightText: 2007-2021 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""C expressions over declared variables, composed from a small set of operators."""
+
+import enum
+
+
+class Expression:
+    """Abstract C expression that renders itself as source text."""
+
+    is_lvalue = False
+
+    def __str__(self):
+        raise NotImplementedError
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        return isinstance(other, Expression) and str(self) == str(other)
+
+    def __hash__(self):
+        return hash(str(self))
+
+
+class LiteralExpression(Expression):
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return str(self.value)
+
+
+class VariableNameExpression(Expression):
+    """The name of a declared variable; always an lvalue."""
+
+    is_lvalue = True
+
+    def __init__(self, variable):
+        self.variable = variable
+
+    def __str__(self):
+        return self.variable.name
+
+
+class UnaryExpression(Expression):
+    def __init__(self, operator, operand):
+        self.operator = operator
+        self.operand = operand
+        self.is_lvalue = operator.makes_lvalue
+
+    def __str__(self):
+        return self.operator.fmt % self.operand
+
+
+class BinaryExpression(Expression):
+    def __init__(self, operator, left, right):
+        self.operator = operator
+        self.left = left
+        self.right = right
+        self.is_lvalue = operator.makes_lvalue
+
+    def __str__(self):
+        return self.operator.fmt % (self.left, self.right)
+
+
+class Operator(enum.Enum):
+    """C operators that keep size and alignment class of their operand
+    traceable: `add` and `subscript` are binary, the rest are unary."""
+
+    add = ("(%s + %s)", False)
+    addressof = ("(&%s)", False)
+    pointer = ("(*%s)", True)
+    subscript = ("%s[%s]", True)
+
+    def __init__(self, fmt, makes_lvalue):
+        self.fmt = fmt
+        self.makes_lvalue = makes_lvalue
+
+
+# Structurally identical expressions share one instance, so nodes form a
+# DAG instead of a tree and set membership mostly compares identities.
+_intern = {}
+
+
+def _interned(key, build, *args):
+    expr = _intern.get(key)
+    if expr is None:
+        expr = _intern[key] = build(*args)
+    return expr
+
+
+def _unary_operation(operator):
+    def operation(expr):
+        return _interned((operator, str(expr)), UnaryExpression, operator, expr)
+
+    operation.operator = operator
+    return operation
+
+
+# stable callables, so edge-op lists can be compared with `is`
+Operator.addressof.operation = _unary_operation(Operator.addressof)
+Operator.pointer.operation = _unary_operation(Operator.pointer)
+
+
+class PartialExpression:
+    """A binary operator with its right operand fixed; calling it on an
+    expression completes the application."""
+
+    def __init__(self, operator, right):
+        self.operator = operator
+        self.right = right
+
+    def __call__(self, expr):
+        return _interned(
+            (self.operator, str(expr), str(self.right)),
+            BinaryExpression,
+            self.operator,
+            expr,
+            self.right,
+        )
+
+    def __repr__(self):
+        return "PartialExpression(%s, %s)" % (self.operator.name, self.right)
@@ -0,0 +1,340 @@
+# This file is part of CPAchecker,
+# a tool for configurable software verification:
+# https://cpachecker.sosy-lab.org
+#
+# SPDX-FileCopyrightText: 2007-2021 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""Generation of C programs that check size and alignment of expressions.
+
+An `ExpressionGenerator` builds a graph whose nodes collect expressions of
+the same size and alignment class, and renders the graph as a C program
+that prints or asserts those sizes and alignments for a machine model.
+"""
+
+import os
+from collections import deque
+
+from .ccodes import Alignment, Pointer, standard_types
+from .expressions import (
+    LiteralExpression,
+    Operator,
+    PartialExpression,
+    VariableNameExpression,
+)
+
+MODE_PRINTS = "prints"
+MODE_STATIC_ASSERTS = "static asserts"
+MODE_ASSERTS = "asserts"
+
+
+def _identity(expr):
+    return expr
+
+
+# open directories once and address the generated files relative to
+# them, so the kernel does not walk the full path for every file
+_DIR_FDS = {}
+
+
+def _dir_fd(dirname):
+    fd = _DIR_FDS.get(dirname)
+    if fd is None:
+        fd = _DIR_FDS[dirname] = os.open(dirname, os.O_DIRECTORY)
+    return fd
+
+
+def _write_if_changed(filename, text):
+    """Write the file only if its content would change.
+
+    Identical files keep their mtime, so mtime-based tools downstream
+    (ccache, make-style dependency tracking) still see them as fresh;
+    the write itself goes through a rename, never a truncated file.
+    """
+    data = text.encode()
+    dfd = _dir_fd(os.path.dirname(filename) or ".")
+    name = os.path.basename(filename)
+    try:
+        rfd = os.open(name, os.O_RDONLY, dir_fd=dfd)
+    except FileNotFoundError:
+        pass
+    else:
+        with open(rfd, "rb") as fp:
+            if fp.read() == data:
+                return False
+    tmp = name + ".tmp"
+    # one os.write on a raw descriptor: no buffered file object for the
+    # hundreds of small files written per run
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644, dir_fd=dfd)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+    os.replace(tmp, name, src_dir_fd=dfd, dst_dir_fd=dfd)
+    return True
+
+
+def _drain(generated):
+    """Consume a generator of expressions for its side effects only."""
+    deque(generated, maxlen=0)
+
+
+class Node:
+    """Collects expressions sharing one size and alignment class.
+
+    Each expression entering the node is composed with every operation in
+    ``composed`` (which keeps the expression in the same class, e.g. ``+ 0``).
+    """
+
+    def __init__(self, ctype, align_override=Alignment.NoAttr, composed=(_identity,)):
+        self.ctype = ctype
+        self.align_override = align_override
+        self._composed = tuple(composed)
+        self._seen = set()
+        self.expressions = []
+
+    def extend(self, vs):
+        """Add the given expressions and their compositions, yielding the new ones."""
+        for v in vs:
+            for op in self._composed:
+                e = op(v)
+                if e not in self._seen:
+                    # cached as a plain attribute for the edge builders' inner loop
+                    e._is_lv = bool(e.is_lvalue)
+                    self._seen.add(e)
+                    self.expressions.append(e)
+                    yield e
+
+
+class ExpressionGenerator:
+    """Builds expressions over a variable and renders them as check programs."""
+
+    # shared literals and partial applications, built once per class,
+    # so no VariableNameExpression is rebuilt per generator instance
+    __zero = LiteralExpression(0)
+    __unit = LiteralExpression(1)
+    __zvar = VariableNameExpression(standard_types["INT"].declare("z"))
+    __add0 = PartialExpression(Operator.add, __zero)
+    __addz = PartialExpression(Operator.add, __zvar)
+    __get0 = PartialExpression(Operator.subscript, __zero)
+    __getz = PartialExpression(Operator.subscript, __zvar)
+
+    # common-case edge op lists, hoisted so graph builds allocate nothing
+    # and ops stay identity-comparable across calls
+    _PLUS0 = [__add0, __addz]
+    _DEREF0 = [Operator.pointer.operation, __get0]
+    _DEREFZ = _DEREF0 + [__getz]
+
+    def __init__(
+        self,
+        loop_depth=1,
+        cycle_depth=1,
+        pointer_arithmetic=False,
+        number_arithmetic=False,
+    ):
+        self.loop_depth = loop_depth
+        self.cycle_depth = cycle_depth
+        self.pointer_arithmetic = pointer_arithmetic
+        self.number_arithmetic = number_arithmetic
+        self.__node = {}
+        self.__records = None
+        self.__texts = {}
+
+    def __new_node(self, title, ctype, align_override=Alignment.NoAttr, composed=None):
+        if composed is None:
+            composed = (_identity,)
+        node = Node(ctype, align_override, composed)
+        self.__node[title] = node
+        return node
+
+    def __edge(self, n_from, n_to, ops):
+        """Apply each op to each expression of ``n_from``, adding to ``n_to``.
+
+        Lazy: expressions are built and added one by one while the caller
+        drains the generator, never materializing the full edge at once.
+        """
+
+        def apply_ops():
+            # snapshot the source, the target may be the same node
+            for n1 in list(n_from.expressions):
+                for op1 in ops:
+                    if op1 is Operator.addressof.operation and not n1._is_lv:
+                        continue
+                    yield op1(n1)
+
+        yield from n_to.extend(apply_ops())
+
+    def __cycle2(self, na, nb, ops_ab, ops_ba):
+        """One round trip between two nodes; yields expressions added to ``na``."""
+        _drain(self.__edge(na, nb, ops_ab))
+        yield from self.__edge(nb, na, ops_ba)
+
+    def graph_ta_va(self, variable):
+        """Build the expression graph for a variable of an arithmetic type
+        declared with type- and variable-alignment attributes."""
+        plus0 = self._PLUS0
+        deref0 = self._DEREF0
+        derefz = self._DEREFZ
+        # arithmetic on types below int rank promotes to int and changes the size class
+        arithmetic_ok = self.number_arithmetic and not getattr(
+            variable.ctype, "promotes", False
+        )
+        value_composed = (_identity, *plus0) if arithmetic_ok else (_identity,)
+        self.__records = None
+        self.__texts = {}
+        addr_composed = (_identity, *plus0) if self.pointer_arithmetic else (_identity,)
+        nv = self.__new_node(
+            "v", variable.ctype, variable.align, composed=value_composed
+        )
+        na = self.__new_node("&v", Pointer(variable.ctype), composed=addr_composed)
+        _drain(nv.extend([VariableNameExpression(variable)]))
+        deref_ops = derefz if self.pointer_arithmetic else deref0
+        for _ in range(self.cycle_depth):
+            _drain(self.__cycle2(nv, na, [Operator.addressof.operation], deref_ops))
+        for _ in range(self.loop_depth):
+            _drain(self.__edge(nv, nv, plus0 if arithmetic_ok else []))
+
+    def graph_pa_va(self, variable):
+        """Build the expression graph for a pointer variable declared with
+        pointer- and variable-alignment attributes."""
+        plus0 = self._PLUS0
+        deref0 = self._DEREF0
+        derefz = self._DEREFZ
+        addr_composed = (_identity, *plus0) if self.pointer_arithmetic else (_identity,)
+        self.__records = None
+        self.__texts = {}
+        np = self.__new_node(
+            "p", variable.ctype, variable.align, composed=addr_composed
+        )
+        nd = self.__new_node("*p", variable.ctype.ref)
+        _drain(np.extend([VariableNameExpression(variable)]))
+        deref_ops = derefz if self.pointer_arithmetic else deref0
+        for _ in range(self.cycle_depth):
+            _drain(self.__cycle2(np, nd, deref_ops, [Operator.addressof.operation]))
+        for _ in range(self.loop_depth):
+            _drain(self.__edge(np, np, plus0 if self.pointer_arithmetic else []))
+
+    def nodes(self):
+        """The graph as a mapping from node title to its expressions."""
+        return {title: list(node.expressions) for title, node in self.__node.items()}
+
+    def render_expressions(self):
+        """Render all expressions of the graph once, machine-independently.
+
+        Returns a list of ``(title, expression strings, ctype, align_override)``
+        records, cached until the next graph build.
+        """
+        if self.__records is None:
+            self.__records = [
+                (
+                    str(node.expressions[0]),
+                    [str(e) for e in node.expressions],
+                    node.ctype,
+                    node.align_override,
+                )
+                for node in self.__node.values()
+            ]
+        return self.__records
+
+    def render_for_machine(self, records, machine, mode):
+        """Substitute one machine model's numbers into pre-rendered records."""
+        # individual check lines, joined once at the end
+        parts = []
+        for title, exprs, ctype, align_override in records:
+            size, align = machine.size_align_of(ctype)
+            align = machine.align_of(align_override) or align
+            for expr in exprs:
+                if mode == MODE_PRINTS:
+                    parts.append(
+                        '    printf("%%zu %%zu\\n", sizeof(%s), __alignof__(%s));'
+                        % (expr, expr)
+                    )
+                    continue
+                checks = [
+                    (
+                        "sizeof(%s) == sizeof(%s)" % (expr, title),
+                        "size of %s differs from size of %s" % (expr, title),
+                    ),
+                    (
+                        "sizeof(%s) == %d" % (title, size),
+                        "size of %s is not %d" % (title, size),
+                    ),
+                    (
+                        "__alignof__(%s) == %d" % (title, align),
+                        "alignof %s is not %d" % (title, align),
+                    ),
+                ]
+                if mode == MODE_STATIC_ASSERTS:
+                    parts.extend(
+                        '_Static_assert(%s, "%s");' % (check, message)
+                        for check, message in checks
+                    )
+                else:
+                    parts.extend("    assert(%s);" % check for check, _ in checks)
+        if not parts:
+            return ""
+        return "\n".join(parts) + "\n"
+
+    def text_graph(self, mode, variable, machine):
+        """Render all checks of the graph for the given machine model.
+
+        Rendered text is cached until the next graph build. The prints
+        text contains no machine-dependent numbers at all, so every
+        machine model shares one entry for it.
+        """
+        key = (mode, None if mode == MODE_PRINTS else machine.name)
+        text = self.__texts.get(key)
+        if text is None:
+            text = self.__texts[key] = self.render_for_machine(
+                self.render_expressions(), machine, mode
+            )
+        return text
+
+    def program_for(self, mode, variable, machine, filename_prefix):
+        """Write the full check program for one mode and machine model.
+
+        Returns the list of written filenames. A sidecar fingerprint of
+        everything the program content depends on is written next to the
+        file; when it matches, reruns skip the rendering and return the
+        file as is.
+        """
+        filename = filename_prefix + "-" + mode.replace(" ", "-") + ".c"
+        sidecar = filename + ".fp"
+        fingerprint = repr(
+            (
+                mode,
+                machine.name,
+                self.loop_depth,
+                self.cycle_depth,
+                self.pointer_arithmetic,
+                self.number_arithmetic,
+                variable.declaration,
+                variable.ctype.declaration,
+            )
+        )
+        try:
+            with open(sidecar) as fp:
+                if fp.read() == fingerprint and os.path.exists(filename):
+                    return [filename]
+        except OSError:
+            pass
+        text = self.text_graph(mode=mode, variable=variable, machine=machine)
+        lines = []
+        if mode == MODE_PRINTS:
+            lines.append("#include <stdio.h>")
+        elif mode == MODE_ASSERTS:
+            lines.append("#include <assert.h>")
+        if variable.ctype.declaration:
+            lines.append(variable.ctype.declaration)
+        lines.append("int z = 0;")
+        lines.append(variable.declaration)
+        if mode == MODE_STATIC_ASSERTS:
+            lines.append(text)
+            lines.append("int main() {\n    return 0;\n}")
+        else:
+            lines.append("int main() {")
+            lines.append(text + "    return 0;\n}")
+        _write_if_changed(filename, "\n".join(lines) + "\n")
+        _write_if_changed(sidecar, fingerprint)
+        return [filename]
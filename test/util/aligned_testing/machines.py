@@ -0,0 +1,140 @@
+# This file is part of CPAchecker,
+# a tool for configurable software verification:
+# https://cpachecker.sosy-lab.org
+#
+# SPDX-FileCopyrightText: 2007-2021 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""Machine models that mirror the GCC and CPAchecker machine options,
+with sizes and default alignments of the standard types."""
+
+from .ccodes import Array, Number, Pointer, Void
+
+
+class Machine:
+    """Sizes and default alignments of the standard types for one machine model."""
+
+    _NUM_NICKS = (
+        "bool",
+        "char",
+        "short",
+        "int",
+        "long",
+        "llong",
+        "float",
+        "double",
+        "ldouble",
+    )
+
+    __slots__ = (
+        ("name", "gcc_option", "cpa_option", "pointer", "align_pointer", "_nums")
+        + _NUM_NICKS
+        + tuple("align_" + n for n in _NUM_NICKS)
+    )
+
+    def __init__(
+        self,
+        name,
+        gcc_option,
+        cpa_option,
+        bool=1,
+        char=1,
+        short=2,
+        int=4,
+        long=8,
+        llong=8,
+        float=4,
+        double=8,
+        ldouble=16,
+        pointer=8,
+        align_bool=1,
+        align_char=1,
+        align_short=2,
+        align_int=4,
+        align_long=8,
+        align_llong=8,
+        align_float=4,
+        align_double=8,
+        align_ldouble=16,
+        align_pointer=8,
+    ):
+        self.name = name
+        self.gcc_option = gcc_option
+        self.cpa_option = cpa_option
+        self.bool = bool
+        self.char = char
+        self.short = short
+        self.int = int
+        self.long = long
+        self.llong = llong
+        self.float = float
+        self.double = double
+        self.ldouble = ldouble
+        self.pointer = pointer
+        self.align_bool = align_bool
+        self.align_char = align_char
+        self.align_short = align_short
+        self.align_int = align_int
+        self.align_long = align_long
+        self.align_llong = align_llong
+        self.align_float = align_float
+        self.align_double = align_double
+        self.align_ldouble = align_ldouble
+        self.align_pointer = align_pointer
+        # size and default alignment per typenick, on the hot path of
+        # size_align_of, so no attribute name needs to be built per call
+        self._nums = {
+            n: (getattr(self, n), getattr(self, "align_" + n)) for n in self._NUM_NICKS
+        }
+
+    def align_of(self, alignment):
+        """The alignment in bytes an attribute requires, 0 if there is no attribute."""
+        return alignment.code
+
+    def size_align_of(self, t):
+        """Return ``(size, alignment)`` of the given `CType` on this machine.
+
+        Array chains are folded iteratively: lengths multiply up and the
+        outermost alignment attribute wins over any inner one.
+        """
+        length = 1
+        override = 0
+        while isinstance(t, Array):
+            if not override:
+                override = self.align_of(t.alignment)
+            length *= t.length
+            t = t.ref
+        if not override:
+            override = self.align_of(t.alignment)
+        if isinstance(t, Number):
+            size, align = self._nums[t.typenick]
+        elif isinstance(t, Pointer):
+            size, align = self.pointer, self.align_pointer
+        elif isinstance(t, Void):
+            size, align = 1, 1
+        else:
+            raise TypeError("unexpected type %r" % t)
+        return size * length, override or align
+
+    def __repr__(self):
+        return "Machine(%r)" % self.name
+
+
+machine_models = [
+    Machine(
+        "linux32",
+        "-m32",
+        "-32",
+        long=4,
+        llong=8,
+        ldouble=12,
+        pointer=4,
+        align_long=4,
+        align_llong=4,
+        align_double=4,
+        align_ldouble=4,
+        align_pointer=4,
+    ),
+    Machine("linux64", "-m64", "-64"),
+]
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+
+# This file is part of CPAchecker,
+# a tool for configurable software verification:
+# https://cpachecker.sosy-lab.org
+#
+# SPDX-FileCopyrightText: 2007-2021 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""Generates C test programs that check sizes, alignments, and member
+offsets of packed and aligned types.
+
+For every type a "printer" program is compiled with the host GCC and
+executed; its output is a header of ``#define SIZE.../ALIGN.../ADIFF...``
+constants that the generated test bodies assert against.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent import futures
+from functools import lru_cache
+from itertools import combinations_with_replacement, count
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+DEPTH = 2
+BODY_LIMIT = 9000
+# printer output is deterministic per (source, gcc) pair, so it is cached
+# on disk across regenerations
+CACHE_DIR = os.path.expanduser("~/.cache/cpachecker-pa-gen")
+# target size of one generated test file; partitioning by bytes instead of
+# line count keeps the parallel gcc compile of the parts load-balanced
+TARGET_BYTES = 256 << 10
+
+arithmetic_types = [
+    "_Bool",
+    "char",
+    "short",
+    "int",
+    "long",
+    "long long",
+    "float",
+    "double",
+    "long double",
+]
+
+# pre-encoded bytes templates filled with bytes.__mod__ and positional
+# arguments: the fastest formatting path CPython offers for this, with no
+# template parsing or re-encoding per emitted line (note the doubled %%
+# that survives into the C format string)
+PRINTF_VAR = (
+    b'    printf("#define SIZE%s %%zu\\n'
+    b'#define ALIGN%s %%zu\\n", sizeof(%s), __alignof__(%s));\n'
+)
+ASSERT_VAR = (
+    b"    assert(sizeof(%s) == SIZE%s);\n    assert(__alignof__(%s) == ALIGN%s);"
+)
+PRINTF_MEMBER = PRINTF_VAR
+ASSERT_MEMBER = ASSERT_VAR
+# offsetof folds to an integer constant expression even at -O0, unlike the
+# pointer subtraction it replaced, so the offset checks can be static
+PRINTF_OFFSET = b'    printf("#define ADIFF%s %%zu\\n", offsetof(struct %s, %s));\n'
+ASSERT_OFFSET = b'    _Static_assert(offsetof(struct %s, %s) == ADIFF%s, "");'
+
+
+_TYPEINFO_RE = re.compile(rb"#define (SIZE|ALIGN)V(\d+_\d+) (\d+)")
+
+
+@lru_cache(maxsize=None)
+def tdef_header(typename, tdef_lvl):
+    """The typedef line introducing the given level.
+
+    Pure in its arguments and repeated per test set, so it is cached.
+    """
+    previous = typename if tdef_lvl == 1 else "t{0}".format(tdef_lvl - 1)
+    return "typedef {0} t{1};".format(previous, tdef_lvl)
+
+
+def _write_bytes(path, data):
+    """Write a file in one syscall on a raw descriptor."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+def _var_mods(depth):
+    """All variable modifier strings in breadth-first order up to the given
+    depth: '' (plain), 'p' (pointer), '3' (array of 3), 'pp', 'p3', ...."""
+    mods = [""]
+    frontier = [""]
+    for _ in range(depth):
+        frontier = [ms + mod for ms in frontier for mod in ("p", "3")]
+        mods += frontier
+    return mods
+
+
+VAR_MODS = _var_mods(DEPTH)
+
+# every packed/aligned attribute combination a generated struct is declared with
+PALIGNED = (
+    " ",
+    " __attribute__((__packed__)) ",
+    *(f" __attribute__((__aligned__({x}))) " for x in (1, 2, 4, 8, 16, 32)),
+    *(f" __attribute__((__packed__, __aligned__({x}))) " for x in (1, 2, 4, 8, 16, 32)),
+)
+
+
+def all_mods_var_decl(test, typename, tdef_lvl):
+    """Declare variables of the given type with all modifier combinations
+    up to DEPTH, and emit their printer and assert lines."""
+    for ms in VAR_MODS:
+        name = "v{0}_{1}".format(next(test.counter), tdef_lvl)
+        nick = "V" + name[1:]
+        decl = name
+        expr = name
+        # the leading-star state is known from the modifier history,
+        # no need to probe the strings at every step
+        decl_deref = expr_deref = False
+        for mod in ms:
+            if mod == "p":
+                decl = "*" + ("" if decl_deref else " ") + decl
+                decl_deref = True
+                expr = "*" + ("" if expr_deref else " ") + expr
+                expr_deref = True
+            else:
+                decl = f"({decl})[{mod}]" if decl_deref else f"{decl}[{mod}]"
+                decl_deref = False
+                expr = f"({expr})[{mod}]" if expr_deref else f"{expr}[{mod}]"
+                expr_deref = False
+        test.declare_var_with(typename, decl, expr, nick)
+
+
+class Test:
+    """Accumulates the pieces of one generated test: declarations,
+    printer lines, and assert lines."""
+
+    # fixed slots instead of a per-instance dict: attribute access on these
+    # objects is the hottest remaining pure-Python work in the generator
+    __slots__ = ("counter", "tdef", "head", "info", "body")
+
+    def __init__(self):
+        # a C-level iterator; numbering variables is pure inner-loop work
+        self.counter = count(1)
+        # declarations and printer lines spill to disk past 1 MiB instead of
+        # holding the whole generated corpus in memory until flush time;
+        # the body stays a list because it is partitioned into files later
+        self.tdef = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+        self.head = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+        self.info = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+        self.body = []
+
+    def declare_var_with(self, typename, decl, expr, nick):
+        self.head.write(f"{typename} {decl};\n".encode())
+        nick = nick.encode()
+        expr = expr.encode()
+        self.info.write(PRINTF_VAR % (nick, nick, expr, expr))
+        self.body.append(ASSERT_VAR % (expr, nick, expr, nick))
+
+
+@lru_cache(maxsize=None)
+def _gcc_fingerprint():
+    """The gcc version banner, part of every cache key."""
+    return subprocess.run(
+        ["gcc", "--version"], check=True, stdout=subprocess.PIPE
+    ).stdout
+
+
+def _cache_path(printer_path):
+    """Where the output of this printer is cached for the host gcc."""
+    with open(printer_path, "rb") as fp:
+        digest = hashlib.blake2b(fp.read() + _gcc_fingerprint(), digest_size=16)
+    return os.path.join(CACHE_DIR, digest.hexdigest() + ".out")
+
+
+def _pin_worker():
+    """Pin a compile worker (and the gcc it spawns) to one core.
+
+    Runs once per worker process; without pinning the scheduler migrates
+    the many short-lived gcc processes between cores, which adds
+    noticeable jitter to the per-printer compile time.
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return
+    cpus = sorted(os.sched_getaffinity(0))
+    os.sched_setaffinity(0, {cpus[os.getpid() % len(cpus)]})
+
+
+def compile_and_capture(printer_path):
+    """Compile one printer with GCC and run it, returning its stdout.
+
+    Runs in a worker process; the executable name is unique per worker,
+    so parallel jobs cannot clobber each other's a.out.
+    """
+    out = os.path.join(tempfile.gettempdir(), "a_{0}.out".format(os.getpid()))
+    subprocess.run(
+        [
+            "gcc",
+            "-fmax-errors=3",
+            # the printer is run once and thrown away: feed the assembler
+            # through a pipe and skip unwind tables and stack protectors
+            "-pipe",
+            "-O0",
+            "-fno-asynchronous-unwind-tables",
+            "-fno-stack-protector",
+            "-o",
+            out,
+            printer_path,
+        ],
+        check=True,
+        stderr=subprocess.PIPE,
+    )
+    printing = subprocess.run([out], check=True, stdout=subprocess.PIPE)
+    return printing.stdout
+
+
+def run_printers(jobs):
+    """Compile and run all printers in parallel, one job per printer.
+
+    Takes ``(key, printer_path)`` pairs; returns ``key -> stdout`` map.
+    """
+    results = {}
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    cache_paths = {}
+    misses = []
+    for key, path in jobs:
+        cached = cache_paths[key] = _cache_path(path)
+        try:
+            with open(cached, "rb") as fp:
+                results[key] = fp.read()
+        except FileNotFoundError:
+            misses.append((key, path))
+    if not misses:
+        return results
+    with futures.ProcessPoolExecutor(
+        max_workers=os.cpu_count(), initializer=_pin_worker
+    ) as executor:
+        for (key, _), stdout in zip(
+            misses, executor.map(compile_and_capture, [path for _, path in misses])
+        ):
+            results[key] = stdout
+            _write_bytes(cache_paths[key], stdout)
+    return results
+
+
+class TestSet:
+    """All generated files for one type: a printer, a header with the
+    captured constants, and the partitioned test bodies."""
+
+    __slots__ = (
+        "typename",
+        "filepath",
+        "test",
+        "sizes",
+        "aligns",
+        "defines",
+    )
+
+    def __init__(self, typename, filepath):
+        self.typename = typename
+        self.filepath = filepath
+        self.test = Test()
+        self.sizes = {}
+        self.aligns = {}
+        self.defines = b""
+        os.makedirs(filepath, exist_ok=True)
+
+    def tdef_header(self, tdef_lvl):
+        return tdef_header(self.typename, tdef_lvl)
+
+    def prepare_test(self, tdef_lvl):
+        """Declare a typedef level and all its modified variables."""
+        if tdef_lvl == 0:
+            typename = self.typename
+        else:
+            typename = "t{0}".format(tdef_lvl)
+            self.test.tdef.write(self.tdef_header(tdef_lvl).encode() + b"\n")
+        self.declare_typedef_vars(typename, tdef_lvl)
+
+    def declare_typedef_vars(self, typename, tdef_lvl):
+        all_mods_var_decl(self.test, typename, tdef_lvl)
+
+    def printer_path(self):
+        return os.path.join(self.filepath, "printer.c")
+
+    @staticmethod
+    def _copy(spool, fp):
+        spool.seek(0)
+        shutil.copyfileobj(spool, fp)
+
+    def write_printer(self):
+        with open(self.printer_path(), "wb") as fp:
+            fp.write(b"#include <stdio.h>\n#include <stddef.h>\n")
+            self._copy(self.test.tdef, fp)
+            self._copy(self.test.head, fp)
+            fp.write(b"int main() {\n")
+            self._copy(self.test.info, fp)
+            fp.write(b"    return 0;\n}\n")
+        return self.printer_path()
+
+    def add_typeinfo(self, printing):
+        """Parse the printer output and remember the constants.
+
+        One pass of a compiled regex over the whole buffer; struct
+        constants are only replayed into the header.
+        """
+        self.defines = printing
+        sizes = self.sizes
+        aligns = self.aligns
+        for stat, idx, value in _TYPEINFO_RE.findall(printing):
+            if stat == b"SIZE":
+                sizes[idx] = int(value)
+            else:
+                aligns[idx] = int(value)
+
+    def write_headers(self):
+        with open(os.path.join(self.filepath, "vars.h"), "wb") as fp:
+            self._copy(self.test.tdef, fp)
+            self._copy(self.test.head, fp)
+            fp.write(self.defines)
+
+    def write_bodies(self):
+        """Partition the assert lines into files of roughly TARGET_BYTES each.
+
+        Assert lines vary a lot in length (member-chain asserts are much
+        longer than plain var asserts), so cutting by accumulated byte
+        count instead of line count evens out the compile time per part.
+        """
+        body = self.test.body
+        # +1 per line for the joining newline
+        byte_lengths = [len(line) + 1 for line in body]
+        part = 0
+        start = 0
+        total = 0
+        for i, n in enumerate(byte_lengths):
+            total += n
+            if total >= TARGET_BYTES:
+                part += 1
+                self.__write_body(part, body[start : i + 1])
+                start = i + 1
+                total = 0
+        if start < len(body) or part == 0:
+            self.__write_body(part + 1, body[start:])
+
+    def __write_body(self, part, body):
+        _write_bytes(
+            os.path.join(self.filepath, "test_{0}.c".format(part)),
+            b"#include <assert.h>\n"
+            b"#include <stddef.h>\n"
+            b'#include "vars.h"\n'
+            b"int main() {\n" + b"\n".join(body) + b"\n    return 0;\n}\n",
+        )
+
+
+def generate_arithmetic_type(dirpath, typename):
+    """Prepare the test set of one arithmetic type; returns it with its
+    printer path so the compile step can be batched."""
+    nick = typename.replace(" ", "_")
+    ts = TestSet(typename, os.path.join(dirpath, nick))
+    for tdef_lvl in range(DEPTH + 1):
+        ts.prepare_test(tdef_lvl)
+    return ts, ts.write_printer()
+
+
+def generate_all_arithmetic_types(dirpath):
+    sets = []
+    jobs = []
+    for typename in arithmetic_types:
+        ts, printer = generate_arithmetic_type(dirpath, typename)
+        sets.append(ts)
+        jobs.append((ts.typename, printer))
+    results = run_printers(jobs)
+    for ts in sets:
+        ts.add_typeinfo(results[ts.typename])
+        ts.write_headers()
+        ts.write_bodies()
+
+
+def gen_simple_structs(dirpath, member_types, member_count):
+    """Generate structs over all member-type combinations and all
+    packed/aligned attribute variants, with offset checks per member."""
+    struct_ids = count(1)
+    file_ids = count(1)
+    test = Test()
+    sets = []
+    jobs = []
+
+    def flush():
+        name = "structs_{0}".format(next(file_ids))
+        ts = TestSet("struct", os.path.join(dirpath, name))
+        ts.test = test
+        sets.append(ts)
+        jobs.append((name, ts.write_printer()))
+
+    for members in combinations_with_replacement(member_types, member_count):
+        # the member declarations do not depend on the attribute variant
+        member_decl_lines = tuple(
+            f"    {member_type} m{i};".encode() for i, member_type in enumerate(members)
+        )
+        for paligned in PALIGNED:
+            sname = "S{0}".format(next(struct_ids))
+            svar = "s{0}".format(sname)
+            test.head.write(f"struct{paligned}{sname} {{\n".encode())
+            test.head.write(b"\n".join(member_decl_lines) + b"\n")
+            test.head.write(b"};\n")
+            test.head.write(f"struct {sname} {svar};\n".encode())
+            sname_b = sname.encode()
+            svar_b = svar.encode()
+            test.info.write(PRINTF_VAR % (sname_b, sname_b, svar_b, svar_b))
+            test.body.append(ASSERT_VAR % (svar_b, sname_b, svar_b, sname_b))
+            for i, _ in enumerate(members):
+                nick = f"{sname}M{i}".encode()
+                expr = f"{svar}.m{i}".encode()
+                member = f"m{i}".encode()
+                test.info.write(PRINTF_MEMBER % (nick, nick, expr, expr))
+                test.info.write(PRINTF_OFFSET % (nick, sname_b, member))
+                test.body.append(ASSERT_MEMBER % (expr, nick, expr, nick))
+                test.body.append(ASSERT_OFFSET % (sname_b, member, nick))
+            if len(test.body) > BODY_LIMIT:
+                flush()
+                test = Test()
+    if test.body:
+        flush()
+    results = run_printers(jobs)
+    for ts in sets:
+        ts.add_typeinfo(results[os.path.basename(ts.filepath)])
+        ts.write_headers()
+        ts.write_bodies()
+
+
+if __name__ == "__main__":
+    output_dir = (
+        sys.argv[1]
+        if len(sys.argv) > 1
+        else os.path.join("test", "programs", "c_attributes", "packed_aligned")
+    )
+    generate_all_arithmetic_types(output_dir)
+    gen_simple_structs(
+        os.path.join(output_dir, "structs"), ["char", "int", "double"], 2
+    )
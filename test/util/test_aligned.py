@@ -0,0 +1,796 @@
+#!/usr/bin/env python3
+
+# This file is part of CPAchecker,
+# a tool for configurable software verification:
+# https://cpachecker.sosy-lab.org
+#
+# SPDX-FileCopyrightText: 2007-2021 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""Checks that CPAchecker agrees with the host compiler on sizes and
+alignments of declarations with ``__aligned__`` attributes.
+
+For every machine model, type alignment, and variable alignment, C
+programs are generated from one expression graph; the compiler checks
+the static-assert variant, CPAchecker verifies the assert variant, and
+the prints variant is run natively and compared against the output of
+the program CPAchecker re-exports from its CFA.
+"""
+
+import argparse
+import bz2
+import filecmp
+import glob
+import hashlib
+import logging
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from xml.etree import ElementTree
+from collections import namedtuple
+from concurrent import futures
+from functools import lru_cache
+
+from aligned_testing.ccodes import Alignment, Number, Pointer, standard_types
+from aligned_testing.generator import (
+    MODE_ASSERTS,
+    MODE_PRINTS,
+    MODE_STATIC_ASSERTS,
+    ExpressionGenerator,
+)
+from aligned_testing.machines import machine_models
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ALIGNED_DIR = os.path.join(ROOT_DIR, "test", "programs", "c_attributes", "aligned")
+CPA_SH = os.path.join(ROOT_DIR, "scripts", "cpa.sh")
+CPA_COMMAND = (CPA_SH, "-default", "-benchmark", "-heap", "1200M")
+CPA_PRINTS = (CPA_SH, "-prints", "-benchmark", "-heap", "1200M")
+# compiler and CPAchecker results are replayed from here when the command
+# and every input file are byte-identical to an earlier run
+CACHE_DIR = os.path.expanduser("~/.cache/cpa-align-test")
+
+# set from the command line in main()
+ARGS = None
+SCRATCH_DIR = None
+
+# the command-line choices as one immutable value: threaded explicitly
+# instead of living in mutable module globals, so helpers depending on it
+# are pure in their arguments and can be memoized per configuration
+Config = namedtuple(
+    "Config",
+    [
+        "cc_command",
+        "only_print",
+        "batch",
+        "cpa_command",
+        "cpa_prints",
+        "loop_depth",
+        "cycle_depth",
+        "pointer_arithmetic",
+        "number_arithmetic",
+        "rebuild_graphs",
+    ],
+)
+
+# one benchmark definition verifies a whole batch of generated programs
+# with a single CPAchecker start
+BENCHMARK_XML = """<?xml version="1.0"?>
+<!DOCTYPE benchmark PUBLIC "+//IDN sosy-lab.org//DTD BenchExec benchmark 1.9//EN" "https://www.sosy-lab.org/benchexec/benchmark-1.9.dtd">
+<benchmark tool="cpachecker" timelimit="900 s" hardtimelimit="1000 s">
+  <option name="-default"/>
+  <option name="-heap">1200M</option>
+  <option name="%s"/>
+  <tasks>
+%s
+  </tasks>
+</benchmark>
+"""
+
+logger = logging.getLogger(__name__)
+
+_MACHINE_BY_NAME = {machine.name: machine for machine in machine_models}
+_TYPEKEYS = {ctype: key for key, ctype in standard_types.items()}
+
+# iterating __members__ builds a fresh mappingproxy view every time;
+# resolve the alignment members and the checked types once
+ALIGNMENTS = tuple(Alignment.__members__.values())
+TYPEKEYS = ("CHAR", "SHORT", "INT", "LDOUBLE")
+
+
+@lru_cache(maxsize=None)
+def _which(program):
+    """Resolve a program once; an absolute path is one of the conditions
+    for subprocess's vfork/posix_spawn fast path."""
+    return shutil.which(program) or program
+
+
+def run(command, output=None):
+    """Run the command and return its output as bytes; raise with the
+    decoded stderr if it fails.
+
+    Assumes the process runs from the repository root (main() changes
+    there). Keeping cwd/preexec_fn unset and close_fds=False lets
+    subprocess launch via posix_spawn instead of fork+exec, which avoids
+    copying the page tables of this process for every one of the
+    thousands of launches. The output stays bytes: the callers only scan
+    it for ASCII markers, so nothing is decoded unless a failure is
+    actually reported.
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        # joining the command is per-launch allocation, skip it when
+        # debug logging is filtered anyway
+        logger.debug("running %s", " ".join(command))
+    result = subprocess.run(
+        [_which(command[0]), *command[1:]],
+        stdout=output or subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        close_fds=False,
+    )
+    if result.returncode:
+        raise RuntimeError(
+            "command %s failed:\n%s"
+            % (" ".join(command), result.stderr.decode("utf8", "replace"))
+        )
+    return result.stdout
+
+
+@lru_cache(maxsize=None)
+def _cpa_fingerprint():
+    """A stamp of the built CPAchecker, for the cache keys of its runs.
+
+    cpa.sh itself rarely changes when CPAchecker is rebuilt, so the
+    build artifacts are part of the key: the mtime and size of
+    cpachecker.jar when one exists, otherwise the class files of a
+    development build (plain ant populates only bin/, and cpa.sh runs
+    from it), so a rebuild invalidates the replayed entries either way.
+    """
+    try:
+        st = os.stat(os.path.join(ROOT_DIR, "cpachecker.jar"))
+        return "jar:%d:%d" % (st.st_mtime_ns, st.st_size)
+    except OSError:
+        pass
+    newest = count = 0
+    for dirpath, _, filenames in os.walk(os.path.join(ROOT_DIR, "bin")):
+        for name in filenames:
+            if name.endswith(".class"):
+                count += 1
+                mtime = os.stat(os.path.join(dirpath, name)).st_mtime_ns
+                if mtime > newest:
+                    newest = mtime
+    if count:
+        return "bin:%d:%d" % (newest, count)
+    # no build at all: a unique stamp disables replay instead of
+    # letting every unbuilt checkout share one cache key
+    return "unbuilt:%d:%d" % (os.getpid(), time.time_ns())
+
+
+def _cache_entry(command, input_files):
+    """The cache directory for this invocation.
+
+    The key covers the arguments and the bytes of every input file; for
+    CPAchecker runs the callers include cpa.sh itself, so a rebuilt
+    CPAchecker invalidates its entries. Volatile arguments such as the
+    per-worker output path must not be part of ``command``.
+    """
+    key = hashlib.sha256()
+    for arg in command:
+        key.update(arg.encode() + b"\0")
+    for name in input_files:
+        with open(name, "rb") as fp:
+            key.update(fp.read())
+    return os.path.join(CACHE_DIR, key.hexdigest())
+
+
+def _cache_store(entry, files, stdout=None):
+    """Populate a cache entry, atomically via rename.
+
+    ``files`` maps names inside the entry to the produced files to keep.
+    """
+    tmp = entry + ".tmp" + str(os.getpid())
+    os.makedirs(tmp)
+    if stdout is not None:
+        with open(os.path.join(tmp, "stdout"), "wb") as fp:
+            fp.write(stdout)
+    for cached_name, path in files.items():
+        shutil.copyfile(path, os.path.join(tmp, cached_name))
+    try:
+        os.rename(tmp, entry)
+    except OSError:
+        # a parallel worker stored the same entry first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def compile_and_run(command, filename, outfilename):
+    """Compile the file natively, run it, and write its output to a file.
+
+    The program output is cached by source content, so reruns skip both
+    the compile and the execution. The executable lives in the temporary
+    directory, never in the checkout, and its name is unique per process
+    and thread, so neither parallel workers nor a worker's helper thread
+    clobber each other's binaries.
+    """
+    entry = _cache_entry(command, [filename])
+    cached = os.path.join(entry, "out")
+    if os.path.isfile(cached):
+        shutil.copyfile(cached, outfilename)
+        return
+    exe = os.path.join(
+        SCRATCH_DIR or tempfile.gettempdir(),
+        "a.out.%d.%d" % (os.getpid(), threading.get_ident()),
+    )
+    # one launch instead of two: the shell execs the compiler via "$@",
+    # then replaces itself with the compiled program, redirecting its
+    # stdout straight to the output file
+    script = '"$@" && exec "%s" > "%s"' % (exe, outfilename)
+    run(["/bin/sh", "-c", script, "sh"] + command + ["-o", exe, filename])
+    _cache_store(entry, {"out": outfilename})
+
+
+def run_cpachecker(command, filename, output_path):
+    """Let CPAchecker verify the program; expect the result TRUE.
+
+    The verdict is cached, so byte-identical reruns skip the JVM start.
+    """
+    entry = _cache_entry(command + [_cpa_fingerprint()], [filename, CPA_SH])
+    cached = os.path.join(entry, "stdout")
+    if os.path.isfile(cached):
+        with open(cached, "rb") as fp:
+            stdout = fp.read()
+    else:
+        stdout = run(command + ["-setprop", "output.path=" + output_path, filename])
+        _cache_store(entry, {}, stdout=stdout)
+    # scan the multi-megabyte output as bytes, decode only on failure
+    if b"Verification result: TRUE." not in stdout:
+        raise RuntimeError(
+            "CPAchecker did not prove %s:\n%s"
+            % (filename, stdout.decode("utf8", "replace"))
+        )
+
+
+def run_cpachecker_batch(filenames, machine, fdir):
+    """Verify a batch of programs with one CPAchecker invocation.
+
+    Writes a benchmark definition listing every file and runs the
+    bundled benchmark runner once, so the JVM start is amortized over
+    the whole batch instead of being paid per file. A batch whose files
+    were all proven before is replayed from the cache without any run.
+    """
+    entry = _cache_entry(
+        ["batch", machine.cpa_option, _cpa_fingerprint()],
+        list(filenames) + [CPA_SH],
+    )
+    if os.path.isdir(entry):
+        logger.info("batch for %s replayed from cache", machine.name)
+        return
+    tasks = "\n".join("    <include>%s</include>" % f for f in filenames)
+    xmlfile = os.path.join(fdir, "tasks-%s.xml" % machine.name)
+    with open(xmlfile, "w", encoding="utf8") as fp:
+        fp.write(BENCHMARK_XML % (machine.cpa_option, tasks))
+    # a fresh directory per invocation: benchexec only ever adds
+    # timestamped result files, so a persistent directory would mix this
+    # run's verdicts with those of earlier runs
+    outdir = os.path.join(fdir, "results-" + machine.name)
+    shutil.rmtree(outdir, ignore_errors=True)
+    # the verdicts are read from the results files, not from the log
+    run(
+        [
+            sys.executable,
+            os.path.join(ROOT_DIR, "scripts", "benchmark.py"),
+            xmlfile,
+            "--outputpath",
+            outdir + os.sep,
+        ],
+        output=subprocess.DEVNULL,
+    )
+    _check_batch_results(outdir, len(filenames))
+    # only proven batches are stored; a failed batch raises above
+    _cache_store(entry, {})
+
+
+def _check_batch_results(outdir, expected):
+    """Check that every run in the benchmark results was proven true."""
+    proven = 0
+    failed = []
+    for name in glob.glob(os.path.join(outdir, "**", "*results*.xml*"), recursive=True):
+        with open(name, "rb") as fp:
+            data = fp.read()
+        if name.endswith(".bz2"):
+            data = bz2.decompress(data)
+        for run_elem in ElementTree.fromstring(data).iter("run"):
+            for column in run_elem.iter("column"):
+                if column.get("title") == "status":
+                    if column.get("value", "").startswith("true"):
+                        proven += 1
+                    else:
+                        failed.append(run_elem.get("name"))
+    if failed or proven != expected:
+        raise RuntimeError(
+            "CPAchecker proved %d of %d batched programs, failed: %s"
+            % (proven, expected, failed)
+        )
+
+
+@lru_cache(maxsize=None)
+def _machine_commands(cfg, machine_name):
+    """The per-machine command lists, assembled once per configuration
+    instead of being concatenated again inside every job."""
+    machine = _MACHINE_BY_NAME[machine_name]
+    ccc = list(cfg.cc_command) + [machine.gcc_option] if cfg.cc_command else None
+    return (
+        ccc,
+        list(cfg.cpa_command) + [machine.cpa_option],
+        list(cfg.cpa_prints) + [machine.cpa_option],
+    )
+
+
+def _output_path():
+    """The per-worker CPAchecker output directory, on the scratch tmpfs
+    when one is used."""
+    return os.path.join(SCRATCH_DIR or ROOT_DIR, "output-" + str(os.getpid()))
+
+
+def check_prints(cfg, ccc, cpa_prints, filename, fprefix):
+    """Run the prints program natively; unless ``--only-print`` was given,
+    also compare its output against the CFA re-export CPAchecker makes."""
+    expected = fprefix + ".cc_out"
+    if cfg.only_print:
+        compile_and_run(ccc, filename, expected)
+        return
+    # the native chain and the CFA export are independent until the
+    # comparison; run the native side on the helper thread meanwhile
+    native = _in_background(compile_and_run, ccc, filename, expected)
+    output_path = _output_path()
+    cfa = os.path.join(output_path, "cfa.c")
+    entry = _cache_entry(cpa_prints + [_cpa_fingerprint()], [filename, CPA_SH])
+    cached = os.path.join(entry, "cfa.c")
+    if os.path.isfile(cached):
+        os.makedirs(output_path, exist_ok=True)
+        shutil.copyfile(cached, cfa)
+    else:
+        # only the written cfa.c matters, the log is not scanned
+        run(
+            cpa_prints + ["-setprop", "output.path=" + output_path, filename],
+            output=subprocess.DEVNULL,
+        )
+        _cache_store(entry, {"cfa.c": cfa})
+    actual = fprefix + ".cpa_out"
+    compile_and_run(ccc, cfa, actual)
+    native.result()
+    if not filecmp.cmp(expected, actual, shallow=False):
+        # fork diff only to produce a readable report for the failure
+        report = subprocess.run(
+            ["diff", expected, actual], stdout=subprocess.PIPE
+        ).stdout.decode("utf8", "replace")
+        raise RuntimeError(
+            "output of %s differs from its CFA re-export:\n%s" % (filename, report)
+        )
+
+
+# (content digest, machine, mode) combinations already checked in this
+# worker process; many (ta, va) pairs generate bit-identical programs
+_SEEN = set()
+
+# per-worker helper threads: subprocess.run releases the GIL, so two
+# independent subprocess chains of the same job can overlap
+_JOB_POOL = None
+
+
+def _in_background(fn, *args):
+    global _JOB_POOL
+    if _JOB_POOL is None:
+        _JOB_POOL = futures.ThreadPoolExecutor(max_workers=2)
+    return _JOB_POOL.submit(fn, *args)
+
+
+def _digest(filename):
+    with open(filename, "rb") as fp:
+        return hashlib.blake2b(fp.read(), digest_size=16).digest()
+
+
+# one generate-compile-verify task; everything a worker process needs,
+# including the configuration it runs under
+Job = namedtuple(
+    "Job", ["cfg", "kind", "typekey", "ta", "va", "machine", "modes", "fprefix"]
+)
+
+
+@lru_cache(maxsize=None)
+def _graph_for(cfg, kind, typekey, ta, va):
+    """Build the attributed variable and its expression graph once.
+
+    Cached per worker process: the jobs of one (type, alignments) pair
+    differ only in machine and mode, and the graph with its rendered
+    records is machine-independent, so repeat calls reuse both. Built
+    graphs are also pickled to disk, so reruns (e.g. a --numbers run
+    followed by a --pointers run) skip the construction entirely unless
+    --rebuild-graphs is given. The attributed type is a private copy,
+    never the shared standard type.
+    """
+    key = hashlib.sha1(
+        repr(
+            (
+                kind,
+                typekey,
+                ta.name,
+                va.name,
+                cfg.loop_depth,
+                cfg.cycle_depth,
+                cfg.pointer_arithmetic,
+                cfg.number_arithmetic,
+            )
+        ).encode()
+    ).hexdigest()
+    pkl = os.path.join(CACHE_DIR, "graphs", key + ".pkl")
+    if not cfg.rebuild_graphs:
+        try:
+            with open(pkl, "rb") as fp:
+                return pickle.load(fp)
+        except (OSError, pickle.PickleError):
+            pass
+    base = standard_types[typekey]
+    if kind == "pa":
+        ctype = Pointer(base, ta)
+    elif ta == Alignment.NoAttr:
+        ctype = base
+    else:
+        tname = "t" + str(ta.code)
+        ctype = Number(base.typenick, tname)
+        # the typedef carries the attribute, so the private copy must
+        # report ta as its alignment instead of the base type's default
+        ctype.alignment = ta
+        frags = [base.declaration, "typedef ", base.declare(tname, ta, as_string=True)]
+        frags.append("\n")
+        ctype.declaration = "".join(frags)
+    v = ctype.declare("v", va)
+    eg = ExpressionGenerator(
+        loop_depth=cfg.loop_depth,
+        cycle_depth=cfg.cycle_depth,
+        pointer_arithmetic=cfg.pointer_arithmetic,
+        number_arithmetic=cfg.number_arithmetic,
+    )
+    if kind == "pa":
+        eg.graph_pa_va(v)
+    else:
+        eg.graph_ta_va(v)
+    os.makedirs(os.path.dirname(pkl), exist_ok=True)
+    tmp = pkl + ".tmp" + str(os.getpid())
+    with open(tmp, "wb") as fp:
+        pickle.dump((eg, v), fp, protocol=5)
+    os.replace(tmp, pkl)
+    return eg, v
+
+
+def _run_one(job):
+    """Generate, compile, and check the programs of one job.
+
+    Runs in a worker process and handles all modes of one (machine,
+    type align, var align) combination in a single pass, so the graph
+    from the per-process cache and its render records stay hot across
+    the mode variants.
+    """
+    machine = _MACHINE_BY_NAME[job.machine]
+    cfg = job.cfg
+    ccc, cpa_command, cpa_prints = _machine_commands(cfg, job.machine)
+    eg, v = _graph_for(cfg, job.kind, job.typekey, job.ta, job.va)
+    logger.debug("generating programs for %s of type %s", v, v.ctype)
+    deferred = None
+    syntax_check = None
+    for mode in job.modes:
+        filename = eg.program_for(mode, v, machine, job.fprefix)[0]
+        if cfg.batch and mode == MODE_ASSERTS:
+            # verified later, in one benchmark invocation per machine;
+            # duplicates are dropped centrally when the batch is built
+            deferred = filename
+            continue
+        key = (_digest(filename), job.machine, mode)
+        if key in _SEEN:
+            continue
+        _SEEN.add(key)
+        if mode == MODE_PRINTS:
+            check_prints(cfg, ccc, cpa_prints, filename, job.fprefix)
+        elif mode == MODE_STATIC_ASSERTS:
+            # the checks are compile-time, no need to link and run
+            syntax_check = _in_background(run, ccc + ["-fsyntax-only", filename])
+        else:
+            run_cpachecker(cpa_command, filename, _output_path())
+    if syntax_check is not None:
+        syntax_check.result()
+    return deferred
+
+
+@lru_cache(maxsize=None)
+def _default_align(machine_name, typekey):
+    """The default alignment of one type on one machine, computed once:
+    the collection loops ask for it per type, alignment pair, and run."""
+    return _MACHINE_BY_NAME[machine_name].size_align_of(standard_types[typekey])[1]
+
+
+@lru_cache(maxsize=None)
+def _nearest_alignments(machine_name, typekey):
+    """No attribute plus the two attributes nearest to the type's default
+    alignment, resolved once per (machine, type)."""
+    return (Alignment.NoAttr,) + Alignment.get_two_nearest(
+        _default_align(machine_name, typekey)
+    )
+
+
+@lru_cache(maxsize=None)
+def _modes_for(cfg):
+    """The modes to emit for one configuration, computed once: all modes
+    of a combination are handled in one pass over its job."""
+    if cfg.only_print:
+        return (MODE_PRINTS,) if cfg.cc_command else ()
+    modes = []
+    if cfg.cc_command:
+        modes += [MODE_PRINTS, MODE_STATIC_ASSERTS]
+    modes.append(MODE_ASSERTS)
+    return tuple(modes)
+
+
+def __check_type(cfg, args, fdir, ctype, kind="ta"):
+    """Collect the jobs for one type: every machine model and alignment
+    combination, one job per (machine, type alignment, variable alignment).
+
+    The loops are pure bookkeeping; the subprocess-dominated work happens
+    later when `_run_jobs` fans the collected jobs out to a process pool.
+    """
+    os.makedirs(fdir, exist_ok=True)
+    typekey = _TYPEKEYS[ctype]
+    nick = ctype.typeid.replace(" ", "_")
+    modes = _modes_for(cfg)
+    jobs = []
+    for machine in machine_models:
+        mname = machine.name
+        logger.info("\tchecking machine %s", mname)
+        # nothing below depends on more than (machine, ta): the alignment
+        # selection and the filename prefix are hoisted out of the inner loops
+        if args.all_alignments:
+            tas = vas = ALIGNMENTS
+        else:
+            tas = vas = _nearest_alignments(mname, typekey)
+        # one subdirectory per machine model: flat directories with
+        # thousands of entries make every open pay for the name lookup
+        machine_dir = os.path.join(fdir, mname)
+        os.makedirs(machine_dir, exist_ok=True)
+        machine_prefix = os.path.join(machine_dir, nick + "-")
+        for ta in tas:
+            ta_code = ta.code
+            logger.info("\t\tchecking type align %s", ta_code)
+            fprefix_prefix = machine_prefix + str(ta_code) + "v"
+            for va in vas:
+                va_code = va.code
+                logger.info("\t\t\tchecking var align %s", va_code)
+                fprefix = fprefix_prefix + str(va_code)
+                jobs.append(Job(cfg, kind, typekey, ta, va, mname, modes, fprefix))
+    return jobs
+
+
+def _run_jobs(jobs, fdir):
+    """Fan the collected jobs of all types out to one process pool.
+
+    The typekeys share no mutable state (workers rebuild the expression
+    graph from the pickle cache), so their jobs interleave freely in a
+    single pool capped at `os.cpu_count()` workers; a pool per typekey
+    would only oversubscribe the cores.
+    """
+    pending = {}  # machine name -> files deferred into one batch
+    with futures.ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        submitted = {executor.submit(_run_one, job): job for job in jobs}
+        try:
+            for future in futures.as_completed(submitted):
+                filename = future.result()
+                if filename:
+                    pending.setdefault(submitted[future].machine, []).append(filename)
+        except Exception:
+            # fail fast: drop the queued jobs instead of finishing the
+            # whole fan-out after the first broken program
+            executor.shutdown(cancel_futures=True)
+            raise
+    for machine_name, filenames in pending.items():
+        # completion order is nondeterministic, the batch should not be
+        filenames.sort()
+        seen = set()
+        unique = []
+        for filename in filenames:
+            key = _digest(filename)
+            if key not in seen:
+                seen.add(key)
+                unique.append(filename)
+        run_cpachecker_batch(unique, _MACHINE_BY_NAME[machine_name], fdir)
+
+
+def check_numbers(cfg, args):
+    """Check arithmetic types declared with type- and variable-alignment
+    attributes."""
+    _graph_for.cache_clear()
+    fdir = os.path.join(ALIGNED_DIR, "numbers_as_tava")
+    jobs = []
+    for typekey in TYPEKEYS:
+        jobs += __check_type(cfg, args, fdir, standard_types[typekey], kind="ta")
+    _run_jobs(jobs, fdir)
+
+
+def check_pointers(cfg, args):
+    """Check pointers declared with pointer- and variable-alignment
+    attributes."""
+    _graph_for.cache_clear()
+    fdir = os.path.join(ALIGNED_DIR, "pointers_as_pava")
+    jobs = []
+    for typekey in TYPEKEYS:
+        jobs += __check_type(cfg, args, fdir, standard_types[typekey], kind="pa")
+    _run_jobs(jobs, fdir)
+
+
+def _fast_jvm_arguments(batch):
+    """Extra JVM options that cut CPAchecker's per-invocation startup cost.
+
+    CPAchecker has no daemon mode that could keep one JVM alive across
+    the generated files, so the class-loading share of every start is
+    shortened with a class-data archive instead; it is created on first
+    use (JDK 19+, older JVMs ignore the flags) and lives next to the
+    invocation cache.
+    """
+    archive = os.path.join(CACHE_DIR, "cpa-cds.jsa")
+    arguments = (
+        "-XX:+IgnoreUnrecognizedVMOptions"
+        " -XX:+AutoCreateSharedArchive"
+        " -XX:SharedArchiveFile=" + archive
+    )
+    if not batch:
+        # per-file JVMs live for seconds and never profit from the upper
+        # JIT tiers or a parallel collector; the long-lived batch JVM
+        # keeps full tiered compilation
+        arguments += " -XX:TieredStopAtLevel=1 -XX:+UseSerialGC"
+    return arguments
+
+
+STRICT_CC_FLAGS = "-Wall -Wextra -Werror -std=c11"
+
+
+def parse_compiler_args(parser):
+    """Add the compiler selection options to the parser."""
+    strict = STRICT_CC_FLAGS
+    # ccache's direct mode hashes the preprocessed source, so generated
+    # programs that only differ in filename share one cached object
+    ccache = shutil.which("ccache")
+    prefix = [ccache] if ccache else []
+    compilers = parser.add_mutually_exclusive_group()
+    compilers.add_argument(
+        "--gcc",
+        dest="cc_command",
+        action="store_const",
+        const=prefix + ("gcc " + strict).split(),
+        help="compile the generated programs with GCC",
+    )
+    compilers.add_argument(
+        "--clang",
+        dest="cc_command",
+        action="store_const",
+        const=prefix + ("clang " + strict).split(),
+        help="compile the generated programs with Clang",
+    )
+
+
+@lru_cache(maxsize=None)
+def _build_parser():
+    """Build the argument parser once per process; constructing ~15
+    argparse actions is pure overhead when repeated in-process."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parse_compiler_args(parser)
+    parser.add_argument(
+        "--only-print",
+        action="store_true",
+        help="only generate and natively run the prints programs, "
+        "without invoking CPAchecker",
+    )
+    parser.add_argument(
+        "--all-alignments",
+        action="store_true",
+        help="check all attribute combinations instead of just the "
+        "alignments around each type's default",
+    )
+    parser.add_argument(
+        "--scratch-dir",
+        default=(
+            os.path.join("/dev/shm", "cpa-align-%d" % os.getuid())
+            if os.path.isdir("/dev/shm")
+            else None
+        ),
+        help="directory for the transient generated files and CPAchecker "
+        "output, by default on tmpfs; pass an empty string to generate "
+        "in the repository tree",
+    )
+    parser.add_argument(
+        "--rebuild-graphs",
+        action="store_true",
+        help="ignore the on-disk cache of built expression graphs",
+    )
+    parser.add_argument("--loop-depth", type=int, default=1)
+    parser.add_argument("--cycle-depth", type=int, default=1)
+    parser.add_argument("--pointer-arithmetic", action="store_true")
+    parser.add_argument("--number-arithmetic", action="store_true")
+    parser.add_argument(
+        "--no-batch",
+        action="store_true",
+        help="verify each program with its own CPAchecker invocation "
+        "instead of one benchmark run per machine",
+    )
+    parser.add_argument(
+        "--plain-jvm",
+        action="store_true",
+        help="start CPAchecker without the startup-time JVM options",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    checks = parser.add_mutually_exclusive_group(required=True)
+    checks.add_argument(
+        "--numbers",
+        dest="main",
+        action="store_const",
+        const=check_numbers,
+        help="check arithmetic types",
+    )
+    checks.add_argument(
+        "--pointers",
+        dest="main",
+        action="store_const",
+        const=check_pointers,
+        help="check pointer types",
+    )
+    return parser
+
+
+def parse_arguments():
+    return _build_parser().parse_args()
+
+
+def main():
+    global ARGS
+    ARGS = parse_arguments()
+    cfg = Config(
+        cc_command=tuple(ARGS.cc_command) if ARGS.cc_command else (),
+        only_print=ARGS.only_print,
+        batch=not ARGS.no_batch,
+        cpa_command=CPA_COMMAND,
+        cpa_prints=CPA_PRINTS,
+        loop_depth=ARGS.loop_depth,
+        cycle_depth=ARGS.cycle_depth,
+        pointer_arithmetic=ARGS.pointer_arithmetic,
+        number_arithmetic=ARGS.number_arithmetic,
+        rebuild_graphs=ARGS.rebuild_graphs,
+    )
+    # run() relies on the cwd instead of passing cwd= per subprocess
+    os.chdir(ROOT_DIR)
+    # keep the compiler cache out of the transient scratch dir, and make
+    # its hashed paths relative so the cache survives moving the checkout
+    os.environ.setdefault("CCACHE_DIR", os.path.expanduser("~/.cache/cpa-align-ccache"))
+    os.environ.setdefault("CCACHE_BASEDIR", os.getcwd())
+    if ARGS.scratch_dir:
+        # thousands of small transient files: keep them off the disk and
+        # leave a symlink next to the normal location for inspection
+        global ALIGNED_DIR, SCRATCH_DIR
+        SCRATCH_DIR = ARGS.scratch_dir
+        ALIGNED_DIR = os.path.join(SCRATCH_DIR, "aligned")
+        os.makedirs(ALIGNED_DIR, exist_ok=True)
+        link = os.path.join(ROOT_DIR, "test", "programs", "c_attributes", "aligned_shm")
+        os.makedirs(os.path.dirname(link), exist_ok=True)
+        if os.path.islink(link):
+            os.remove(link)
+        os.symlink(ALIGNED_DIR, link)
+    # cpa.sh appends JAVA_VM_ARGUMENTS to the java command line
+    if not ARGS.plain_jvm:
+        os.environ.setdefault("JAVA_VM_ARGUMENTS", _fast_jvm_arguments(cfg.batch))
+    logging.basicConfig(
+        level=logging.DEBUG if ARGS.verbose else logging.INFO,
+        format="%(levelname)s %(message)s",
+    )
+    ARGS.main(cfg, ARGS)
+
+
+if __name__ == "__main__":
+    main()